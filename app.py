@@ -11,19 +11,47 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import csv
+import shutil
+import tempfile
 from datetime import datetime, date, timedelta
 from io import BytesIO
+import pyarrow as pa
+import pyarrow.parquet as pq
 import plotly.express as px
 import plotly.graph_objects as go
 
+try:
+    # optional: native multithreaded CSV reader that parses dates while tokenizing
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    # optional: JIT for the running-balance loop
+    from numba import njit
+except ImportError:
+    njit = None
+
 # -------------------------
 # Config & paths
 # -------------------------
 st.set_page_config(page_title="MoneyBoard / CashFlowVision", layout="wide")
 DATA_DIR = "data"
 DATA_FILE = os.path.join(DATA_DIR, "transactions.csv")
+# typed snapshot of DATA_FILE, read instead of re-parsing the CSV while it is fresh
+PARQUET_FILE = os.path.join(DATA_DIR, "transactions.parquet")
+# schema metadata key holding the (mtime_ns, size) of the CSV the snapshot was built from
+SNAPSHOT_KEY = b"moneyboard.csv_stat"
 DATE_FORMAT = "%Y-%m-%d"
+TYPES = ["Masuk","Keluar"]
+COLUMNS = ["date","description","category","type","amount"]
+IMPORT_CHUNK_ROWS = 50_000  # CSV imports are streamed in chunks of this many rows
+SMALL_FRAME_ROWS = 5000  # below this, generate_insights aggregates with plain NumPy
+FIGURE_CACHE_ENTRIES = 32  # cached figure sets per builder (one per filter combination)
+MAX_CHART_POINTS = 5000  # above this, line charts are downsampled before plotting
 
 # -------------------------
 # Helpers: IO & sample data
@@ -44,59 +72,290 @@ def create_sample_data():
     df.to_csv(DATA_FILE, index=False)
     return df
 
-def load_data():
+def type_categorical(values):
+    # Masuk/Keluar first; any other label (typo, "Pemasukan", ...) is kept as its own
+    # category rather than turned into NaN and lost on the next save
+    values = pd.Series(values)
+    extra = sorted(set(values.dropna().astype(str)) - set(TYPES))
+    return pd.Categorical(values, categories=TYPES + extra)
+
+def read_csv(path):
+    if pl is not None:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+        # polars infers types from the first rows only; keep the free-form columns as
+        # text so a late "1.500.000" or odd description is coerced below, not fatal
+        text_cols = {c: pl.Utf8 for c in ("description","category","type","amount") if c in header}
+        try:
+            return pl.read_csv(path, try_parse_dates=True, schema_overrides=text_cols).to_pandas()
+        except (pl.exceptions.PolarsError, TypeError):
+            # TypeError: polars < 1.0 has no schema_overrides; pandas handles it
+            pass
+    return pd.read_csv(path)
+
+def data_mtime():
+    return os.path.getmtime(DATA_FILE) if os.path.exists(DATA_FILE) else 0.0
+
+@st.cache_data(show_spinner=False)
+def _load_cached(mtime):
+    # mtime is only the cache key: a new file version means a fresh parse
     ensure_data_dir()
     if not os.path.exists(DATA_FILE):
-        return create_sample_data()
-    df = pd.read_csv(DATA_FILE)
-    # normalize
+        create_sample_data()
+    if snapshot_is_fresh():
+        # dictionary columns -> Categorical; date32 comes back as datetime64[ms] (or
+        # object for an empty ledger), so pin it to the same dtype as the CSV parse
+        df = pq.read_table(PARQUET_FILE).to_pandas(date_as_object=False)
+        df["date"] = df["date"].astype("datetime64[ns]")
+        return df
+    df = read_csv(DATA_FILE)
+    # normalize; dates stay datetime64 truncated to the day, so callers can compare
+    # and group on the column directly without re-parsing or re-truncating it
     if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"]).dt.date
+        df["date"] = pd.to_datetime(df["date"]).dt.normalize()
     else:
-        df["date"] = pd.to_datetime(df.iloc[:,0]).dt.date
+        df["date"] = pd.to_datetime(df.iloc[:,0]).dt.normalize()
     if "amount" in df.columns:
         df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0).astype(int)
     else:
         df["amount"] = 0
+    # ensure columns exist (cached frames are shared with the insights cache)
+    for c in COLUMNS:
+        if c not in df.columns:
+            df[c] = "" if c!="amount" else 0
+    df["type"] = type_categorical(df["type"])
+    df["category"] = df["category"].astype("category")
+    # hand edits and backdated appends leave the file out of order; sort in memory only
+    # and keep the file's row numbers as the index (the Hapus view's csv_index)
+    df = df.sort_values("date", kind="mergesort")
+    # CSV is newer than the snapshot (first run, appended rows, hand edits): refresh it
+    save_parquet(df)
     return df
 
-def save_data(df):
-    ensure_data_dir()
+def _csv_stat():
+    stat = os.stat(DATA_FILE)
+    return f"{stat.st_mtime_ns},{stat.st_size}".encode()
+
+def snapshot_is_fresh():
+    # exact match only: a restored backup may carry an older (or any) mtime
+    if not os.path.exists(PARQUET_FILE):
+        return False
+    try:
+        meta = pq.read_schema(PARQUET_FILE).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return meta.get(SNAPSHOT_KEY) == _csv_stat()
+
+def load_data():
+    return _load_cached(data_mtime())
+
+def write_csv(df):
     df_out = df.copy()
     df_out["date"] = pd.to_datetime(df_out["date"]).dt.strftime(DATE_FORMAT)
     df_out.to_csv(DATA_FILE, index=False)
 
+def save_data(df):
+    ensure_data_dir()
+    # the file is written in date order, so its row numbers become 0..n-1 again
+    df = df.sort_values("date", kind="mergesort", ignore_index=True)
+    write_csv(df)
+    save_parquet(df)
+    clear_caches()
+
+def csv_header():
+    """Return the ledger CSV header, first adding any missing transaction columns."""
+    ensure_data_dir()
+    with open(DATA_FILE, newline="") as f:
+        header = next(csv.reader(f), [])
+    if not set(COLUMNS).issubset(header):
+        # migrate once from the file's current content, never from a caller's frame
+        save_data(load_data())
+        with open(DATA_FILE, newline="") as f:
+            header = next(csv.reader(f), [])
+    return header
+
+def format_rows(rows, header):
+    """Lay transactions out as CSV rows in the ledger's column order."""
+    out = rows.reindex(columns=header)
+    out["date"] = pd.to_datetime(out["date"]).dt.strftime(DATE_FORMAT)
+    return out
+
+def _open_for_append():
+    missing_newline = False
+    with open(DATA_FILE, "rb") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            missing_newline = f.read(1) != b"\n"
+    f = open(DATA_FILE, "a", newline="")
+    if missing_newline:
+        f.write("\n")
+    return f
+
+def append_data(rows):
+    """Append transactions (a DataFrame) to the CSV without rewriting the file."""
+    header = csv_header()
+    with _open_for_append() as f:
+        format_rows(rows, header).to_csv(f, header=False, index=False, lineterminator="\n")
+    # the Parquet snapshot no longer matches the CSV, so the next load re-parses
+    # (and re-sorts) the CSV once and refreshes it
+    clear_caches()
+
+def append_csv_rows(path):
+    """Append a header-less file of rows laid out by format_rows(rows, COLUMNS)."""
+    header = csv_header()
+    with _open_for_append() as dst, open(path, newline="") as src:
+        if header == COLUMNS:
+            shutil.copyfileobj(src, dst)
+        else:
+            # ledger has its own column order / extra columns: remap row by row
+            pos = [COLUMNS.index(c) if c in COLUMNS else None for c in header]
+            writer = csv.writer(dst, lineterminator="\n")
+            for row in csv.reader(src):
+                writer.writerow(["" if i is None else row[i] for i in pos])
+    clear_caches()
+
+def clear_caches():
+    _load_cached.clear()
+    _insights_cached.clear()
+    dashboard_figures.clear()
+    analysis_figures.clear()
+    _excel_cached.clear()
+
+def save_parquet(df):
+    df_out = df.copy()
+    df_out["date"] = pd.to_datetime(df_out["date"]).dt.date
+    df_out["amount"] = df_out["amount"].astype("int64")
+    if "type" in df_out.columns:
+        df_out["type"] = type_categorical(df_out["type"])
+    if "category" in df_out.columns:
+        df_out["category"] = df_out["category"].astype("category")
+    # keep a non-default index: it maps the sorted rows back to CSV row numbers
+    table = pa.Table.from_pandas(df_out)
+    # record which CSV this snapshot mirrors; written after the CSV, so its stat is final
+    meta = dict(table.schema.metadata or {})
+    meta[SNAPSHOT_KEY] = _csv_stat()
+    pq.write_table(table.replace_schema_metadata(meta), PARQUET_FILE, compression="zstd")
+
 def to_excel_bytes(df):
     output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+    # xlsxwriter is write-only and much faster than openpyxl for exports
+    with pd.ExcelWriter(output, engine="xlsxwriter", datetime_format="yyyy-mm-dd") as writer:
         df.to_excel(writer, index=False, sheet_name="transactions")
     return output.getvalue()
 
+@st.cache_data(show_spinner=False)
+def _excel_cached(mtime):
+    return to_excel_bytes(_load_cached(mtime))
+
+def export_excel():
+    return _excel_cached(data_mtime())
+
 # -------------------------
 # Basic calculations
 # -------------------------
 def compute_summary(df):
-    total_masuk = int(df.loc[df["type"]=="Masuk","amount"].sum())
-    total_keluar = int(df.loc[df["type"]=="Keluar","amount"].sum())
+    # one pass over amount; type is categorical so this groups on its codes
+    s = df.groupby("type", observed=True, sort=False)["amount"].sum()
+    total_masuk = int(s.get("Masuk", 0))
+    total_keluar = int(s.get("Keluar", 0))
     saldo = total_masuk - total_keluar
     return total_masuk, total_keluar, saldo
 
+def isin_codes(col, values):
+    """isin for Categorical columns, compared on integer codes."""
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        return col.isin(values).to_numpy()
+    codes = col.cat.categories.get_indexer(values)
+    # -1 means "not a known category"; drop it so it can't match missing values
+    return np.isin(col.cat.codes.to_numpy(), codes[codes >= 0])
+
+def apply_filters(df, min_date, max_date, sel_types, sel_cats):
+    if df.empty:
+        return df
+    # build one combined mask and index once, instead of copying per filter step
+    mask = df["date"].between(pd.Timestamp(min_date), pd.Timestamp(max_date))
+    if sel_types:
+        mask &= isin_codes(df["type"], sel_types)
+    if sel_cats:
+        mask &= isin_codes(df["category"], sel_cats)
+    return df.loc[mask]
+
+if njit is not None:
+    @njit(cache=True)
+    def _cumbal(amount, is_in):
+        # sign + running sum fused into one loop, no temporaries
+        out = np.empty(amount.size, np.int64)
+        acc = 0
+        for i in range(amount.size):
+            acc += amount[i] if is_in[i] else -amount[i]
+            out[i] = acc
+        return out
+else:
+    def _cumbal(amount, is_in):
+        return np.where(is_in, amount, -amount).cumsum()
+
 def cumulative_balance(df):
-    d = df.sort_values("date").copy()
-    d["amount_signed"] = d.apply(lambda r: r["amount"] if r["type"]=="Masuk" else -r["amount"], axis=1)
-    d["balance"] = d["amount_signed"].cumsum()
+    # transactions are stored sorted by date (see load_data / save paths), so no sort here
+    balance = _cumbal(df["amount"].to_numpy(dtype=np.int64), (df["type"]=="Masuk").to_numpy())
+    d = df.assign(balance=balance)
     return d
 
 # -------------------------
 # Rule-based "AI" analysis
 # -------------------------
+# Both helpers return (tot_in, tot_out, recent_sum, prev_sum, top_cat, n_small_out),
+# where top_cat is (name, total) of the biggest spending category or None.
+def _insight_sums(df, recent_mask, prev_mask):
+    tot_in, tot_out, _ = compute_summary(df)
+
+    # one grouped pass over amount instead of a masked sum per (period, type)
+    bucket = np.where(recent_mask, "recent", np.where(prev_mask, "prev", "old"))
+    g = df.groupby([bucket, "type"], observed=True)["amount"].sum()
+    recent_sum = int(g.get(("recent","Masuk"), 0)) - int(g.get(("recent","Keluar"), 0))
+    prev_sum = int(g.get(("prev","Masuk"), 0)) - int(g.get(("prev","Keluar"), 0))
+
+    out_df = df[df["type"]=="Keluar"]
+    top_cat = None
+    by_cat = out_df.groupby("category", observed=True).amount.sum().sort_values(ascending=False)
+    if not by_cat.empty:
+        top_cat = (by_cat.index[0], int(by_cat.iloc[0]))
+    n_small_out = int((out_df["amount"] < 50000).sum())
+    return tot_in, tot_out, recent_sum, prev_sum, top_cat, n_small_out
+
+def _insight_sums_small(df, recent_mask, prev_mask):
+    # for typical ledger sizes the groupby machinery's fixed cost dominates;
+    # plain NumPy masks over the amount / code arrays are much cheaper
+    amt = df["amount"].to_numpy()
+    in_code, out_code = df["type"].cat.categories.get_indexer(["Masuk","Keluar"])
+    type_codes = df["type"].cat.codes.to_numpy()
+    # code -1 marks a missing value, never a match
+    is_in = (type_codes == in_code) & (type_codes >= 0)
+    is_out = (type_codes == out_code) & (type_codes >= 0)
+    tot_in = int(amt[is_in].sum())
+    tot_out = int(amt[is_out].sum())
+    recent_sum = int(amt[recent_mask & is_in].sum()) - int(amt[recent_mask & is_out].sum())
+    prev_sum = int(amt[prev_mask & is_in].sum()) - int(amt[prev_mask & is_out].sum())
+
+    cats = df["category"].cat
+    cat_codes = cats.codes.to_numpy()
+    has_cat = is_out & (cat_codes >= 0)
+    top_cat = None
+    if has_cat.any():
+        # int64 sums (bincount weights would go through float64), ranked only over
+        # categories that actually have expenses
+        by_cat = np.zeros(len(cats.categories), dtype=np.int64)
+        np.add.at(by_cat, cat_codes[has_cat], amt[has_cat])
+        seen = np.flatnonzero(np.bincount(cat_codes[has_cat], minlength=len(cats.categories)))
+        i = int(seen[by_cat[seen].argmax()])
+        top_cat = (cats.categories[i], int(by_cat[i]))
+    n_small_out = int((is_out & (amt < 50000)).sum())
+    return tot_in, tot_out, recent_sum, prev_sum, top_cat, n_small_out
+
 def generate_insights(df, days_window=30):
     """Return textual insights and recommendations."""
     insights = []
     if df.empty:
         return ["Belum ada data transaksi untuk dianalisis."], []
-    tot_in, tot_out, saldo = compute_summary(df)
-    insights.append(f"Total pemasukan: Rp {tot_in:,.0f}. Total pengeluaran: Rp {tot_out:,.0f}. Saldo akhir: Rp {saldo:,.0f}.")
 
     # trend: compare last 30 days vs previous 30 days (if enough data)
     today = date.today()
@@ -105,11 +364,18 @@ def generate_insights(df, days_window=30):
     start_prev = start_recent - timedelta(days=days_window)
     end_prev = start_recent - timedelta(days=1)
 
-    recent_mask = (pd.to_datetime(df["date"]).dt.date >= start_recent) & (pd.to_datetime(df["date"]).dt.date <= end_recent)
-    prev_mask = (pd.to_datetime(df["date"]).dt.date >= start_prev) & (pd.to_datetime(df["date"]).dt.date <= end_prev)
+    dates = df["date"].to_numpy()
+    recent_mask = (dates >= np.datetime64(start_recent)) & (dates <= np.datetime64(end_recent))
+    prev_mask = (dates >= np.datetime64(start_prev)) & (dates <= np.datetime64(end_prev))
 
-    recent_sum = int(df.loc[recent_mask, "amount"].where(df["type"]=="Masuk", 0).sum()) - int(df.loc[recent_mask, "amount"].where(df["type"]=="Keluar", 0).sum())
-    prev_sum = int(df.loc[prev_mask, "amount"].where(df["type"]=="Masuk", 0).sum()) - int(df.loc[prev_mask, "amount"].where(df["type"]=="Keluar", 0).sum())
+    categorical = all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in ("type","category"))
+    if len(df) < SMALL_FRAME_ROWS and categorical:
+        sums = _insight_sums_small(df, recent_mask, prev_mask)
+    else:
+        sums = _insight_sums(df, recent_mask, prev_mask)
+    tot_in, tot_out, recent_sum, prev_sum, top_cat, n_small_out = sums
+    saldo = tot_in - tot_out
+    insights.append(f"Total pemasukan: Rp {tot_in:,.0f}. Total pengeluaran: Rp {tot_out:,.0f}. Saldo akhir: Rp {saldo:,.0f}.")
 
     if prev_sum == 0:
         insights.append(f"Arus kas bersih dalam {days_window} hari terakhir: Rp {recent_sum:,.0f}. Tidak ada data periode sebelumnya untuk perbandingan.")
@@ -119,11 +385,8 @@ def generate_insights(df, days_window=30):
         insights.append(f"Perbandingan arus kas bersih {days_window} hari terakhir terhadap periode sebelumnya: {sign} ({pct_change:.1f}% perubahan).")
 
     # top spending categories
-    out_df = df[df["type"]=="Keluar"]
-    if not out_df.empty:
-        top_cat = out_df.groupby("category").amount.sum().sort_values(ascending=False)
-        top_cat_name = top_cat.index[0]
-        top_cat_val = int(top_cat.iloc[0])
+    if top_cat is not None:
+        top_cat_name, top_cat_val = top_cat
         insights.append(f"Kategori pengeluaran terbesar: {top_cat_name} (Rp {top_cat_val:,.0f}). Pertimbangkan untuk meninjau pengeluaran di kategori ini.")
     else:
         insights.append("Belum ada pengeluaran tercatat.")
@@ -138,8 +401,7 @@ def generate_insights(df, days_window=30):
         advice.append("Saldo sehat sejauh ini. Pertahankan arus kas dan catat pengeluaran rutin.")
 
     # check many small transactions
-    small_out = out_df[out_df["amount"] < 50000]
-    if len(small_out) > 5:
+    if n_small_out > 5:
         advice.append("Banyak pengeluaran kecil (< Rp50.000). Gabungkan atau kurangi frekuensi jika memungkinkan untuk efisiensi.")
 
     # suggested actions
@@ -150,6 +412,89 @@ def generate_insights(df, days_window=30):
     ]
     return insights, advice + actions
 
+@st.cache_data(show_spinner=False)
+def _insights_cached(mtime, days_window, today):
+    # today is part of the key because the 30-day windows move at midnight
+    return generate_insights(_load_cached(mtime), days_window)
+
+def load_insights(days_window=30):
+    return _insights_cached(data_mtime(), days_window, date.today())
+
+# -------------------------
+# Charts (cached per data version + filter tuple)
+# -------------------------
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices to keep."""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    # n_out-2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        # keep the point forming the largest triangle with the last kept point
+        # and the average of the next bucket
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+def _plot_data(mtime, filters):
+    df = _load_cached(mtime)
+    filtered = apply_filters(df, *filters)
+    return filtered if not filtered.empty else df
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def dashboard_figures(mtime, filters):
+    df_plot = _plot_data(mtime, filters)
+    # group on integer period codes; only the k result rows get formatted as strings
+    month = df_plot["date"].dt.to_period("M").rename("month")
+    monthly = df_plot.groupby([month,"type"], observed=True).amount.sum().reset_index()
+    monthly["month"] = monthly["month"].dt.strftime("%Y-%m")
+    fig = px.bar(monthly, x="month", y="amount", color="type", barmode="group", title="Arus Kas per Bulan (Masuk vs Keluar)")
+
+    cat_sum = df_plot.groupby(["category","type"], observed=True).amount.sum().reset_index()
+    fig2 = None
+    if not cat_sum.empty:
+        fig2 = px.sunburst(cat_sum, path=["type","category"], values="amount", title="Komposisi per Tipe & Kategori")
+    return fig, fig2
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def analysis_figures(mtime, filters):
+    data_plot = _plot_data(mtime, filters)
+    daily = data_plot.groupby(["date","type"], observed=True).amount.sum().reset_index().rename(columns={"date":"date2"})
+    daily_pivot = daily.pivot(index="date2", columns="type", values="amount").fillna(0).reset_index()
+    # WebGL traces; SVG scatter stalls the browser on long histories
+    fig = go.Figure()
+    x = daily_pivot["date2"].to_numpy()
+    for t in TYPES:
+        if t in daily_pivot.columns:
+            y = daily_pivot[t].to_numpy()
+            keep = lttb(x.astype("int64"), y, MAX_CHART_POINTS)
+            fig.add_trace(go.Scattergl(x=x[keep], y=y[keep], mode="lines+markers", name=t))
+
+    cum = cumulative_balance(data_plot)
+    if len(cum) > MAX_CHART_POINTS:
+        cum = cum.iloc[lttb(cum["date"].to_numpy().astype("int64"), cum["balance"].to_numpy(), MAX_CHART_POINTS)]
+    fig2 = px.line(cum, x="date", y="balance", markers=True, render_mode="webgl", title="Saldo Akumulasi")
+
+    out_df = data_plot[data_plot["type"]=="Keluar"]
+    fig3 = None
+    if not out_df.empty:
+        cat_sum = out_df.groupby("category", observed=True).amount.sum().reset_index().sort_values("amount", ascending=False)
+        fig3 = px.bar(cat_sum, x="category", y="amount", title="Pengeluaran per Kategori")
+    return fig, fig2, fig3
+
 # -------------------------
 # App UI
 # -------------------------
@@ -158,11 +503,8 @@ st.markdown("Aplikasi demo multi-dashboard untuk mengelola kas. Data disimpan lo
 
 # Load data
 df = load_data()
-# ensure columns exist
-expected_cols = ["date","description","category","type","amount"]
-for c in expected_cols:
-    if c not in df.columns:
-        df[c] = "" if c!="amount" else 0
+# dates are datetime64 in memory; show them as plain dates like the CSV
+DATE_COLUMN_CONFIG = {"date": st.column_config.DateColumn(format="YYYY-MM-DD")}
 
 # session categories
 if "categories" not in st.session_state:
@@ -188,13 +530,9 @@ with st.sidebar.expander("Filter Utama (opsional)"):
     sel_cats = st.multiselect("Kategori (kosong = semua)", options=list(st.session_state.categories.keys()), default=[])
 
 # apply filters
-filtered = df.copy()
-if not filtered.empty:
-    filtered = filtered[(pd.to_datetime(filtered["date"]).dt.date >= min_date) & (pd.to_datetime(filtered["date"]).dt.date <= max_date)]
-    if sel_types:
-        filtered = filtered[filtered["type"].isin(sel_types)]
-    if sel_cats:
-        filtered = filtered[filtered["category"].isin(sel_cats)]
+filtered = apply_filters(df, min_date, max_date, sel_types, sel_cats)
+# cache key for the chart builders: same data + same filters -> same figures
+filters = (min_date, max_date, tuple(sel_types), tuple(sel_cats))
 
 # ------- Dashboard Utama -------
 if page == "Dashboard Utama":
@@ -212,30 +550,25 @@ if page == "Dashboard Utama":
 
     st.markdown("---")
     # Monthly bar: masuk vs keluar
-    df_plot = (filtered if not filtered.empty else df).copy()
-    if not df_plot.empty:
-        df_plot["month"] = pd.to_datetime(df_plot["date"]).dt.to_period("M").astype(str)
-        monthly = df_plot.groupby(["month","type"]).amount.sum().reset_index()
-        fig = px.bar(monthly, x="month", y="amount", color="type", barmode="group", title="Arus Kas per Bulan (Masuk vs Keluar)")
+    if not df.empty:
+        fig, fig2 = dashboard_figures(data_mtime(), filters)
         st.plotly_chart(fig, use_container_width=True)
 
         # top categories donut
         st.markdown("### Pembagian Kategori (Pengeluaran & Pemasukan)")
-        cat_sum = df_plot.groupby(["category","type"]).amount.sum().reset_index()
-        if not cat_sum.empty:
-            fig2 = px.sunburst(cat_sum, path=["type","category"], values="amount", title="Komposisi per Tipe & Kategori")
+        if fig2 is not None:
             st.plotly_chart(fig2, use_container_width=True)
     else:
         st.info("Tidak ada data untuk periode filter ini.")
 
     st.markdown("---")
     st.subheader("5 Transaksi Terakhir")
-    st.dataframe((df.sort_values("date", ascending=False)).head(5), use_container_width=True)
+    st.dataframe((df.sort_values("date", ascending=False)).head(5), use_container_width=True, column_config=DATE_COLUMN_CONFIG)
 
     # AI analysis
     st.markdown("---")
     st.subheader("Analisis Otomatis (AI-style)")
-    insights, actions = generate_insights(df)
+    insights, actions = load_insights()
     st.markdown("**Ringkasan:**")
     for ins in insights:
         st.write("- " + ins)
@@ -260,16 +593,13 @@ elif page == "Input Transaksi":
             upload_receipt = st.file_uploader("Upload bukti (opsional)", type=["png","jpg","pdf"])
         submitted = st.form_submit_button("Simpan Transaksi")
     if submitted:
-        new = pd.DataFrame([{
+        append_data(pd.DataFrame([{
             "date": tdate,
             "description": tdesc if tdesc else ("Pemasukan" if ttype=="Masuk" else "Pengeluaran"),
             "category": tcat,
             "type": ttype,
             "amount": int(tamount)
-        }])
-        df = pd.concat([df, new], ignore_index=True)
-        df["date"] = pd.to_datetime(df["date"]).dt.date
-        save_data(df)
+        }]))
         st.success("Transaksi tersimpan ✅")
         st.experimental_rerun()
 
@@ -277,7 +607,7 @@ elif page == "Input Transaksi":
 elif page == "Tabel Transaksi":
     st.header("Tabel & Manajemen Transaksi")
     st.write("Gunakan filter di sidebar untuk mempersempit tampilan. Kamu bisa menghapus baris di bawah.")
-    st.dataframe(filtered.sort_values("date", ascending=False), use_container_width=True)
+    st.dataframe(filtered.sort_values("date", ascending=False), use_container_width=True, column_config=DATE_COLUMN_CONFIG)
 
     st.markdown("### Hapus Transaksi")
     st.write("Pilih index (nomor baris di CSV) untuk menghapus transaksi.")
@@ -292,30 +622,18 @@ elif page == "Tabel Transaksi":
 # ------- Grafik & Analisis -------
 elif page == "Grafik & Analisis":
     st.header("Grafik & Analisis Mendalam")
-    data_plot = (filtered if not filtered.empty else df).copy()
-    if data_plot.empty:
+    if df.empty:
         st.info("Tidak ada data untuk dibuat grafik.")
     else:
+        fig, fig2, fig3 = analysis_figures(data_mtime(), filters)
         st.subheader("Tren Harian (Masuk vs Keluar)")
-        daily = data_plot.groupby([pd.to_datetime(data_plot["date"]).dt.date,"type"]).amount.sum().reset_index().rename(columns={"date":"date2"})
-        daily_pivot = daily.pivot(index="date2", columns="type", values="amount").fillna(0).reset_index()
-        fig = go.Figure()
-        if "Masuk" in daily_pivot.columns:
-            fig.add_trace(go.Scatter(x=daily_pivot["date2"], y=daily_pivot["Masuk"], mode="lines+markers", name="Masuk"))
-        if "Keluar" in daily_pivot.columns:
-            fig.add_trace(go.Scatter(x=daily_pivot["date2"], y=daily_pivot["Keluar"], mode="lines+markers", name="Keluar"))
         st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("Saldo Akumulasi")
-        cum = cumulative_balance(data_plot)
-        fig2 = px.line(cum, x="date", y="balance", markers=True, title="Saldo Akumulasi")
         st.plotly_chart(fig2, use_container_width=True)
 
         st.subheader("Pengeluaran per Kategori (Bar)")
-        out_df = data_plot[data_plot["type"]=="Keluar"]
-        if not out_df.empty:
-            cat_sum = out_df.groupby("category").amount.sum().reset_index().sort_values("amount", ascending=False)
-            fig3 = px.bar(cat_sum, x="category", y="amount", title="Pengeluaran per Kategori")
+        if fig3 is not None:
             st.plotly_chart(fig3, use_container_width=True)
 
 # ------- Import / Export -------
@@ -323,28 +641,46 @@ elif page == "Impor/Ekspor":
     st.header("Impor & Ekspor Data")
     st.subheader("Ekspor data saat ini")
     if st.button("Download Excel (.xlsx)"):
-        st.download_button("Download .xlsx", data=to_excel_bytes(df), file_name="transactions.xlsx")
+        st.download_button("Download .xlsx", data=export_excel(), file_name="transactions.xlsx")
     st.subheader("Impor CSV / Excel")
     uploaded = st.file_uploader("Unggah CSV atau XLSX (kolom: date,description,category,type,amount)", type=["csv","xlsx"])
     if uploaded is not None:
+        imported = None
+        tmp_path = None
         try:
             if uploaded.name.endswith(".csv"):
-                incoming = pd.read_csv(uploaded)
-            else:
-                incoming = pd.read_excel(uploaded)
-            # normalize date
-            incoming["date"] = pd.to_datetime(incoming["date"]).dt.date
-            required = set(["date","description","category","type","amount"])
-            if not required.issubset(set(incoming.columns)):
-                st.error("File tidak sesuai. Pastikan kolom: date,description,category,type,amount")
+                # stream the upload so peak memory is one chunk, not file + ledger
+                chunks = pd.read_csv(uploaded, chunksize=IMPORT_CHUNK_ROWS)
             else:
-                df = pd.concat([df, incoming[list(required)]], ignore_index=True)
-                df["amount"] = pd.to_numeric(df["amount"], errors="coerce").fillna(0).astype(int)
-                save_data(df)
-                st.success(f"Berhasil mengimpor {len(incoming)} baris.")
-                st.experimental_rerun()
+                chunks = [pd.read_excel(uploaded)]
+            # stage every chunk first (in COLUMNS order); the ledger, including any
+            # header migration, is only touched once the whole upload has parsed
+            fd, tmp_path = tempfile.mkstemp(suffix=".import.tmp", dir=DATA_DIR)
+            with os.fdopen(fd, "w", newline="") as staged:
+                count = 0
+                for incoming in chunks:
+                    if not set(COLUMNS).issubset(set(incoming.columns)):
+                        st.error("File tidak sesuai. Pastikan kolom: date,description,category,type,amount")
+                        break
+                    incoming = incoming[COLUMNS].copy()
+                    # normalize date & amount
+                    incoming["date"] = pd.to_datetime(incoming["date"])
+                    incoming["amount"] = pd.to_numeric(incoming["amount"], errors="coerce").fillna(0).astype("int64")
+                    format_rows(incoming, COLUMNS).to_csv(staged, header=False, index=False, lineterminator="\n")
+                    count += len(incoming)
+                else:
+                    imported = count
+            if imported is not None:
+                append_csv_rows(tmp_path)
         except Exception as e:
+            imported = None
             st.error("Gagal mengimpor: " + str(e))
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
+        if imported is not None:
+            st.success(f"Berhasil mengimpor {imported} baris.")
+            st.experimental_rerun()
 
 # ------- Kelola Kategori -------
 elif page == "Kelola Kategori":
@@ -366,9 +702,6 @@ elif page == "Kelola Kategori":
     st.markdown("**Daftar kategori saat ini:**")
     st.json(st.session_state.categories)
 
-# Save (always persist)
-df["date"] = pd.to_datetime(df["date"]).dt.date
-save_data(df)
 st.sidebar.markdown("---")
 st.sidebar.write("Data di simpan lokal di `./data/transactions.csv`.")
 st.caption("Aplikasi demo: kamu bisa kustomisasi lebih jauh (threshold alert, notifikasi, login, dsb).")